@@ -1,11 +1,19 @@
 """CLI commands."""
 
-import shlex
-
-from prettytable import PrettyTable
+import heapq
+import re
+import signal
+from functools import lru_cache
+from operator import itemgetter
+from types import MappingProxyType
 
 from trade_hub.core import usecases
-from trade_hub.core.currencies import get_supported_currencies
+from trade_hub.core.currencies import (
+    CRYPTO_CODES,
+    CURRENCY_REGISTRY,
+    FIAT_CODES,
+    get_supported_currencies,
+)
 from trade_hub.core.exceptions import (
     ApiRequestError,
     AuthenticationError,
@@ -15,17 +23,28 @@ from trade_hub.core.exceptions import (
     ValidationError,
 )
 
+# "--key value" / "--key \"quoted value\"" / bare "--flag"
+ARG_RE = re.compile(r'(?<!\S)--(\S*)(?:\s+("[^"]*"|(?!--)\S+))?')
+# Whitespace-separated plain or whole-token double-quoted words: ARG_RE
+# parses these exactly like shlex. Anything else (single quotes, backslashes,
+# quotes glued to other characters, unbalanced quotes, "--" inside quotes)
+# goes to shlex.
+SIMPLE_ARGS_RE = re.compile(r'\s*(?:(?:"(?!--)(?:[^"\\\s]|\s(?!--))*"|[^\s"\'\\]+)(?:\s+|$))*')
+
+
+def _parse_shell_args(args_str: str) -> dict:
+    """Parse shell-quoted arguments with shlex."""
+    import shlex
 
-def parse_args(args_str: str) -> dict:
-    """Parse command arguments into dictionary."""
     tokens = shlex.split(args_str)
+    count = len(tokens)
     result = {}
     i = 0
-    while i < len(tokens):
+    while i < count:
         token = tokens[i]
-        if token.startswith("--"):
+        if token[:2] == "--":
             key = token[2:]
-            if i + 1 < len(tokens) and not tokens[i + 1].startswith("--"):
+            if i + 1 < count and tokens[i + 1][:2] != "--":
                 result[key] = tokens[i + 1]
                 i += 2
             else:
@@ -36,18 +55,80 @@ def parse_args(args_str: str) -> dict:
     return result
 
 
+def _parse_args(args_str: str) -> MappingProxyType:
+    """Parse command arguments, using regex for simple input and shlex otherwise."""
+    if not SIMPLE_ARGS_RE.fullmatch(args_str):
+        return MappingProxyType(_parse_shell_args(args_str))
+    return MappingProxyType({
+        m.group(1): m.group(2).strip('"') if m.group(2) else True
+        for m in ARG_RE.finditer(args_str)
+    })
+
+
+_parse_args_cached = lru_cache(maxsize=256)(_parse_args)
+
+
+def parse_args(args_str: str) -> MappingProxyType:
+    """
+    Parse command arguments into read-only mapping.
+
+    Results are cached per input string, so the mapping must not be mutated.
+    Input with --password is never cached, to keep plaintext out of memory.
+    """
+    if "--password" in args_str:
+        return _parse_args(args_str)
+    return _parse_args_cached(args_str)
+
+
+REQUIRED_ARG_ERRORS = {
+    key: f"Error: --{key} is required"
+    for key in ("username", "password", "currency", "amount", "from", "to")
+}
+
+
+def _require(args: dict, *keys: str) -> bool:
+    """Check required arguments are present, printing error for first missing one."""
+    for key in keys:
+        if not args.get(key):
+            print(REQUIRED_ARG_ERRORS[key])
+            return False
+    return True
+
+
+def _render_table(headers: list, rows: list, aligns: str) -> str:
+    """
+    Render bordered text table.
+
+    Args:
+        headers: Column titles
+        rows: List of tuples of pre-formatted cell strings
+        aligns: One "l" or "r" per column
+    """
+    widths = [len(h) for h in headers]
+    for row in rows:
+        for i, cell in enumerate(row):
+            if len(cell) > widths[i]:
+                widths[i] = len(cell)
+
+    specs = [("<" if a == "l" else ">") + str(w) for a, w in zip(aligns, widths)]
+    border = "+" + "+".join("-" * (w + 2) for w in widths) + "+"
+
+    lines = [border, "| " + " | ".join(format(h, s) for h, s in zip(headers, specs)) + " |", border]
+    lines.extend(
+        "| " + " | ".join(format(c, s) for c, s in zip(row, specs)) + " |" for row in rows
+    )
+    lines.append(border)
+    return "\n".join(lines)
+
+
 def cmd_register(args: dict):
     """Handle register command."""
-    username = args.get("username")
-    password = args.get("password")
-
-    if not username:
-        print("Error: --username is required")
-        return
-    if not password:
-        print("Error: --password is required")
+    if not _require(args, "username", "password"):
         return
 
+    username = args["username"]
+    password = args["password"]
+
     try:
         user = usecases.register_user(username=username, password=password)
         print(f"User '{user.username}' registered (id={user.user_id}).")
@@ -58,16 +139,12 @@ def cmd_register(args: dict):
 
 def cmd_login(args: dict):
     """Handle login command."""
-    username = args.get("username")
-    password = args.get("password")
-
-    if not username:
-        print("Error: --username is required")
-        return
-    if not password:
-        print("Error: --password is required")
+    if not _require(args, "username", "password"):
         return
 
+    username = args["username"]
+    password = args["password"]
+
     try:
         user = usecases.login_user(username=username, password=password)
         print(f"Logged in as '{user.username}'")
@@ -88,41 +165,20 @@ def cmd_show_portfolio(args: dict):
 
     try:
         portfolio = usecases.get_portfolio(user.user_id)
-        rates = usecases.get_rates()
 
-        wallets = portfolio.wallets
-        if not wallets:
+        if not portfolio.wallets:
             print(f"Portfolio of user '{user.username}' is empty.")
             return
 
         print(f"Portfolio of user '{user.username}' (base: {base}):")
 
-        table = PrettyTable()
-        table.field_names = ["Currency", "Balance", f"Value in {base}"]
-        table.align["Currency"] = "l"
-        table.align["Balance"] = "r"
-        table.align[f"Value in {base}"] = "r"
-
-        total = 0.0
+        rows, total = usecases.valuate_portfolio(portfolio, base)
 
-        for code, wallet in wallets.items():
-            balance = wallet.balance
-            if code == base:
-                value = balance
-            else:
-                rate_key = f"{code}_{base}"
-                if rate_key in rates and rates[rate_key].get("rate"):
-                    value = balance * rates[rate_key]["rate"]
-                else:
-                    value = None
-
-            if value is not None:
-                total += value
-                table.add_row([code, f"{balance:.4f}", f"{value:.2f} {base}"])
-            else:
-                table.add_row([code, f"{balance:.4f}", "N/A"])
-
-        print(table)
+        table_rows = [
+            (code, f"{balance:.4f}", f"{value:.2f} {base}" if value is not None else "N/A")
+            for code, balance, value in rows
+        ]
+        print(_render_table(["Currency", "Balance", f"Value in {base}"], table_rows, "lrr"))
         print("-" * 40)
         print(f"TOTAL: {total:,.2f} {base}")
 
@@ -133,16 +189,12 @@ def cmd_show_portfolio(args: dict):
 
 def cmd_buy(args: dict):
     """Handle buy command."""
-    currency = args.get("currency")
-    amount = args.get("amount")
-
-    if not currency:
-        print("Error: --currency is required")
-        return
-    if not amount:
-        print("Error: --amount is required")
+    if not _require(args, "currency", "amount"):
         return
 
+    currency = args["currency"]
+    amount = args["amount"]
+
     try:
         amount = float(amount)
         result = usecases.buy_currency(currency_code=currency, amount=amount)
@@ -170,16 +222,12 @@ def cmd_buy(args: dict):
 
 def cmd_sell(args: dict):
     """Handle sell command."""
-    currency = args.get("currency")
-    amount = args.get("amount")
-
-    if not currency:
-        print("Error: --currency is required")
-        return
-    if not amount:
-        print("Error: --amount is required")
+    if not _require(args, "currency", "amount"):
         return
 
+    currency = args["currency"]
+    amount = args["amount"]
+
     try:
         amount = float(amount)
         result = usecases.sell_currency(currency_code=currency, amount=amount)
@@ -209,16 +257,12 @@ def cmd_sell(args: dict):
 
 def cmd_get_rate(args: dict):
     """Handle get-rate command."""
-    from_curr = args.get("from")
-    to_curr = args.get("to")
-
-    if not from_curr:
-        print("Error: --from is required")
-        return
-    if not to_curr:
-        print("Error: --to is required")
+    if not _require(args, "from", "to"):
         return
 
+    from_curr = args["from"]
+    to_curr = args["to"]
+
     try:
         from_curr = from_curr.upper()
         to_curr = to_curr.upper()
@@ -259,17 +303,22 @@ def cmd_update_rates(args: dict):
         for source_name, data in results["sources"].items():
             if data["error"]:
                 print(f"ERROR: Failed to fetch from {source_name}: {data['error']}")
+            elif data["not_modified"]:
+                print(f"INFO: Fetching from {source_name}... OK (not modified)")
             else:
                 print(f"INFO: Fetching from {source_name}... OK ({data['rates']} rates)")
 
-        if results["total_rates"] > 0:
+        if results["saved"]:
             print(f"INFO: Writing {results['total_rates']} rates to data/rates.json...")
 
         if results["errors"]:
             print("Update completed with errors. Check logs/actions.log for details.")
-        else:
+        elif results["saved"]:
             print(f"Update successful. Total rates updated: {results['total_rates']}. "
                   f"Last refresh: {results['last_refresh']}")
+        else:
+            print(f"Update successful. {results['total_rates']} rates unchanged, nothing written. "
+                  f"Last refresh: {results['last_refresh']}")
 
     except ApiRequestError as e:
         print(f"ERROR: {e}")
@@ -287,61 +336,51 @@ def cmd_show_rates(args: dict):
     base = args.get("base", "USD").upper()
 
     storage = RatesStorage()
-    rates = storage.get_all_rates()
+    rows = storage.get_rate_rows()
 
-    if not rates:
+    if not rows:
         print("Local rate cache is empty. Run 'update-rates' to load data.")
         return
 
-    full_data = storage.load_rates()
-    last_refresh = full_data.get("last_refresh", "N/A")
+    last_refresh = storage.load_rates().get("last_refresh", "N/A")
 
     print(f"Rates from cache (updated at {last_refresh}):")
 
     # Filter by currency if specified
     if currency:
         currency = currency.upper()
-        filtered = {k: v for k, v in rates.items() if currency in k and isinstance(v, dict)}
-        if not filtered:
+        rows = [row for row in rows if currency in row[0]]
+        if not rows:
             print(f"Rate for '{currency}' not found in cache.")
             return
-        rates = filtered
 
     if base != "USD":
-        filtered = {}
-        for k, v in rates.items():
-            if k.endswith(f"_{base}") and isinstance(v, dict):
-                filtered[k] = v
-        rates = filtered
-
-    # Sort and limit for --top (filter out non-dict entries)
-    items = [(k, v) for k, v in rates.items() if isinstance(v, dict) and "rate" in v]
-    items.sort(key=lambda x: x[1].get("rate", 0), reverse=True)
+        suffix = f"_{base}"
+        rows = [row for row in rows if row[0].endswith(suffix)]
 
+    # Sort and limit for --top
+    limit = None
     if top:
         try:
-            top = int(top)
-            items = items[:top]
+            limit = int(top)
         except ValueError:
             pass
 
-    # Display rates
-    table = PrettyTable()
-    table.field_names = ["Pair", "Rate", "Source", "Updated"]
-    table.align["Pair"] = "l"
-    table.align["Rate"] = "r"
-    table.align["Source"] = "l"
-    table.align["Updated"] = "l"
+    if limit is not None and 0 <= limit <= len(rows) // 2:
+        # Partial selection is cheaper than full sort for small limits
+        rows = heapq.nlargest(limit, rows, key=itemgetter(1))
+    else:
+        rows = sorted(rows, key=itemgetter(1), reverse=True)
+        if limit is not None:
+            rows = rows[:limit]
 
-    for key, data in items:
-        rate = data.get("rate", 0)
-        source = data.get("source", "N/A")
-        updated = data.get("updated_at", "N/A")
-        if updated and len(updated) > 19:
-            updated = updated[:19]  # Truncate timezone
-        table.add_row([key, f"{rate:.8f}", source, updated])
+    # Display rates, truncating timezone from timestamps
+    table_rows = [
+        (pair, f"{rate:.8f}", source, updated[:19] if updated else updated)
+        for pair, rate, source, updated in rows
+    ]
 
-    print(table)
+    print(_render_table(["Pair", "Rate", "Source", "Updated"], table_rows, "lrll"))
 
 
 def cmd_help(_args: dict):
@@ -362,29 +401,17 @@ def cmd_help(_args: dict):
 
 def cmd_currencies(_args: dict):
     """Show list of supported currencies."""
-    from trade_hub.core.currencies import CURRENCY_REGISTRY
-
     print("Supported currencies:")
     print()
 
-    fiats = []
-    cryptos = []
-
-    for code, currency in CURRENCY_REGISTRY.items():
-        info = currency.get_display_info()
-        if "[FIAT]" in info:
-            fiats.append(info)
-        else:
-            cryptos.append(info)
-
     print("Fiat currencies:")
-    for info in fiats:
-        print(f"  {info}")
+    for code in FIAT_CODES:
+        print(f"  {CURRENCY_REGISTRY[code].get_display_info()}")
 
     print()
     print("Cryptocurrencies:")
-    for info in cryptos:
-        print(f"  {info}")
+    for code in CRYPTO_CODES:
+        print(f"  {CURRENCY_REGISTRY[code].get_display_info()}")
 
 
 COMMANDS = {
@@ -401,28 +428,44 @@ COMMANDS = {
 }
 
 
+def _exit_on_signal(signum, _frame):
+    """Exit normally on termination signal so atexit handlers still run."""
+    raise SystemExit(128 + signum)
+
+
 def run_cli():
     """Run interactive CLI."""
+    # Closing terminal (SIGHUP) or SIGTERM must still flush buffered portfolios
+    for name in ("SIGTERM", "SIGHUP"):
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), _exit_on_signal)
+
     print("Trade Hub - Currency Wallet Application")
     print("Type 'help' for available commands, 'exit' to quit.\n")
 
+    get_command = COMMANDS.get
+
     while True:
         try:
             line = input("> ").strip()
             if not line:
                 continue
 
-            if line.lower() == "exit":
-                print("Goodbye!")
-                break
-
             parts = line.split(maxsplit=1)
-            command = parts[0].lower()
+            command = parts[0]
             args_str = parts[1] if len(parts) > 1 else ""
 
-            if command in COMMANDS:
-                args = parse_args(args_str)
-                COMMANDS[command](args)
+            # Commands are typed in lowercase; only fold case on a miss
+            handler = get_command(command)
+            if handler is None:
+                command = command.lower()
+                if command == "exit" and not args_str:
+                    print("Goodbye!")
+                    break
+                handler = get_command(command)
+
+            if handler is not None:
+                handler(parse_args(args_str))
             else:
                 print(f"Unknown command: {command}. Type 'help' for available commands.")
 
@@ -1,11 +1,16 @@
 """Currency types."""
 
+import sys
 from abc import ABC, abstractmethod
+from functools import lru_cache
+from types import MappingProxyType
 
 
 class Currency(ABC):
     """Abstract base class for all currencies."""
 
+    __slots__ = ("code", "name")
+
     def __init__(self, code: str, name: str):
         if not code or not code.strip():
             raise ValueError("Currency code cannot be empty")
@@ -30,6 +35,8 @@ class Currency(ABC):
 class FiatCurrency(Currency):
     """Fiat currency issued by a country or zone."""
 
+    __slots__ = ("issuing_country",)
+
     def __init__(self, code: str, name: str, issuing_country: str):
         super().__init__(code, name)
         self.issuing_country = issuing_country
@@ -42,6 +49,8 @@ class FiatCurrency(Currency):
 class CryptoCurrency(Currency):
     """Cryptocurrency with algorithm and market cap."""
 
+    __slots__ = ("algorithm", "market_cap")
+
     def __init__(self, code: str, name: str, algorithm: str, market_cap: float = 0.0):
         super().__init__(code, name)
         self.algorithm = algorithm
@@ -53,8 +62,8 @@ class CryptoCurrency(Currency):
         return f"[CRYPTO] {self.code} — {self.name} (Algo: {self.algorithm}, MCAP: {mcap_str})"
 
 
-# Currency registry
-CURRENCY_REGISTRY: dict[str, Currency] = {
+# Currency registry (read-only; keys are canonical upper-case codes)
+CURRENCY_REGISTRY: MappingProxyType[str, Currency] = MappingProxyType({
     "USD": FiatCurrency("USD", "US Dollar", "United States"),
     "EUR": FiatCurrency("EUR", "Euro", "Eurozone"),
     "GBP": FiatCurrency("GBP", "British Pound", "United Kingdom"),
@@ -67,11 +76,24 @@ CURRENCY_REGISTRY: dict[str, Currency] = {
     "LTC": CryptoCurrency("LTC", "Litecoin", "Scrypt", 6.5e9),
     "XRP": CryptoCurrency("XRP", "Ripple", "RPCA", 2.8e10),
     "DOGE": CryptoCurrency("DOGE", "Dogecoin", "Scrypt", 1.2e10),
-}
+})
+
+# Registry codes partitioned by currency type
+FIAT_CODES: tuple[str, ...] = tuple(
+    code for code, currency in CURRENCY_REGISTRY.items() if isinstance(currency, FiatCurrency)
+)
+CRYPTO_CODES: tuple[str, ...] = tuple(
+    code for code, currency in CURRENCY_REGISTRY.items() if isinstance(currency, CryptoCurrency)
+)
 
 
 def get_currency(code: str) -> Currency:
     """Get currency by code from registry."""
+    # Fast path: code is already in canonical form
+    currency = CURRENCY_REGISTRY.get(code)
+    if currency is not None:
+        return currency
+
     from trade_hub.core.exceptions import CurrencyNotFoundError
 
     if not code:
@@ -84,6 +106,12 @@ def get_currency(code: str) -> Currency:
     return CURRENCY_REGISTRY[code]
 
 
+@lru_cache(maxsize=256)
+def get_pair_key(from_code: str, to_code: str) -> str:
+    """Get interned rate key for currency pair (e.g. "BTC_USD")."""
+    return sys.intern(f"{from_code}_{to_code}")
+
+
 def get_supported_currencies() -> list[str]:
     """Get list of supported currency codes."""
     return list(CURRENCY_REGISTRY.keys())
@@ -1,15 +1,34 @@
 """Domain models."""
 
 import hashlib
+import hmac
 import secrets
 from datetime import datetime
+from types import MappingProxyType
 
+from trade_hub.core.currencies import get_pair_key
 from trade_hub.core.exceptions import InsufficientFundsError, ValidationError
 
+# Version of password hashing scheme written by to_dict:
+#   1 - sha256(password + salt)
+#   2 - sha256(salt + password)
+#   3 - blake2b(password) keyed with salt, 32-byte digest
+PASSWORD_SCHEMA_VERSION = 3
+
 
 class User:
     """User account in the trading system."""
 
+    __slots__ = (
+        "_user_id",
+        "_username",
+        "_hashed_password",
+        "_salt",
+        "_hash_ctx_prefix",
+        "_schema_version",
+        "_registration_date",
+    )
+
     def __init__(
         self,
         user_id: int,
@@ -18,6 +37,7 @@ class User:
         hashed_password: str = None,
         salt: str = None,
         registration_date: datetime = None,
+        schema_version: int = PASSWORD_SCHEMA_VERSION,
     ):
         self._user_id = user_id
         self._username = None
@@ -26,18 +46,40 @@ class User:
         if hashed_password and salt:
             self._hashed_password = hashed_password
             self._salt = salt
+            self._hash_ctx_prefix = self._new_hash_ctx(salt)
+            self._schema_version = schema_version
         else:
             if password and len(password) < 4:
                 raise ValidationError("Password must be at least 4 characters long")
-            self._salt = secrets.token_hex(8)
-            self._hashed_password = self._hash_password(password, self._salt)
+            self._set_password(password)
 
         self._registration_date = registration_date or datetime.now()
 
+    def _set_password(self, password: str):
+        """Generate new salt and store hash of password in current scheme."""
+        self._salt = secrets.token_hex(8)
+        # Salt is absorbed once; each hash only copies this state
+        self._hash_ctx_prefix = self._new_hash_ctx(self._salt)
+        self._hashed_password = self._hash_password(password)
+        self._schema_version = PASSWORD_SCHEMA_VERSION
+
+    @staticmethod
+    def _new_hash_ctx(salt: str):
+        """Create BLAKE2b hashing state keyed with salt."""
+        return hashlib.blake2b(key=salt.encode(), digest_size=32)
+
+    def _hash_password(self, password: str) -> str:
+        """Hash password with salt using keyed BLAKE2b."""
+        ctx = self._hash_ctx_prefix.copy()
+        ctx.update(password.encode())
+        return ctx.hexdigest()
+
     @staticmethod
-    def _hash_password(password: str, salt: str) -> str:
-        """Hash password with salt using SHA-256."""
-        return hashlib.sha256((password + salt).encode()).hexdigest()
+    def _hash_password_legacy(password: str, salt: str, schema_version: int) -> str:
+        """Hash password with salt using SHA-256 (schema versions 1 and 2)."""
+        if schema_version == 1:
+            return hashlib.sha256((password + salt).encode()).hexdigest()
+        return hashlib.sha256((salt + password).encode()).hexdigest()
 
     @property
     def user_id(self) -> int:
@@ -71,16 +113,28 @@ class User:
         """Get registration date."""
         return self._registration_date
 
+    @property
+    def needs_rehash(self) -> bool:
+        """Check if stored hash uses outdated scheme."""
+        return self._schema_version < PASSWORD_SCHEMA_VERSION
+
     def verify_password(self, password: str) -> bool:
         """Verify if provided password matches stored hash."""
-        return self._hash_password(password, self._salt) == self._hashed_password
+        if self.needs_rehash:
+            computed = self._hash_password_legacy(password, self._salt, self._schema_version)
+        else:
+            computed = self._hash_password(password)
+        return hmac.compare_digest(computed, self._hashed_password)
+
+    def rehash_password(self, password: str):
+        """Re-hash verified password with current scheme."""
+        self._set_password(password)
 
     def change_password(self, new_password: str):
         """Change user password."""
         if len(new_password) < 4:
             raise ValidationError("Password must be at least 4 characters long")
-        self._salt = secrets.token_hex(8)
-        self._hashed_password = self._hash_password(new_password, self._salt)
+        self._set_password(new_password)
 
     def get_user_info(self) -> dict:
         """Get user information without password."""
@@ -95,9 +149,11 @@ class User:
         return {
             "user_id": self._user_id,
             "username": self._username,
+            "username_lower": self._username.casefold(),
             "hashed_password": self._hashed_password,
             "salt": self._salt,
             "registration_date": self._registration_date.isoformat(),
+            "schema_version": self._schema_version,
         }
 
     @classmethod
@@ -109,12 +165,15 @@ class User:
             hashed_password=data["hashed_password"],
             salt=data["salt"],
             registration_date=datetime.fromisoformat(data["registration_date"]),
+            schema_version=data.get("schema_version", 1),
         )
 
 
 class Wallet:
     """Wallet for a single currency."""
 
+    __slots__ = ("currency_code", "_balance")
+
     def __init__(self, currency_code: str, balance: float = 0.0):
         self.currency_code = currency_code.upper()
         self._balance = 0.0
@@ -128,24 +187,30 @@ class Wallet:
     @balance.setter
     def balance(self, value: float):
         """Set balance with validation."""
-        if not isinstance(value, (int, float)):
-            raise TypeError("Balance must be a number")
-        if value < 0:
+        if type(value) is not float:
+            if not isinstance(value, (int, float)):
+                raise TypeError("Balance must be a number")
+            value = float(value)
+        if value < 0.0:
             raise ValidationError("Balance cannot be negative")
-        self._balance = float(value)
+        self._balance = value
 
     def deposit(self, amount: float):
-        """Add funds to wallet."""
-        if not isinstance(amount, (int, float)):
-            raise TypeError("Amount must be a number")
+        """
+        Add funds to wallet.
+
+        Non-numeric amount raises TypeError from the comparison itself.
+        """
         if amount <= 0:
             raise ValidationError("Amount must be positive")
         self._balance += amount
 
     def withdraw(self, amount: float):
-        """Remove funds from wallet."""
-        if not isinstance(amount, (int, float)):
-            raise TypeError("Amount must be a number")
+        """
+        Remove funds from wallet.
+
+        Non-numeric amount raises TypeError from the comparison itself.
+        """
         if amount <= 0:
             raise ValidationError("Amount must be positive")
         if amount > self._balance:
@@ -179,9 +244,12 @@ class Wallet:
 class Portfolio:
     """Collection of wallets for a single user."""
 
+    __slots__ = ("_user_id", "_wallets", "_wallets_view")
+
     def __init__(self, user_id: int, wallets: dict = None):
         self._user_id = user_id
         self._wallets: dict[str, Wallet] = {}
+        self._wallets_view = MappingProxyType(self._wallets)
 
         if wallets:
             for code, wallet_data in wallets.items():
@@ -199,9 +267,9 @@ class Portfolio:
         return self._user_id
 
     @property
-    def wallets(self) -> dict:
-        """Get copy of wallets dictionary."""
-        return dict(self._wallets)
+    def wallets(self) -> MappingProxyType:
+        """Get read-only view of wallets dictionary."""
+        return self._wallets_view
 
     def add_currency(self, currency_code: str) -> Wallet:
         """Add new wallet for currency if not exists."""
@@ -214,20 +282,34 @@ class Portfolio:
         """Get wallet by currency code."""
         return self._wallets.get(currency_code.upper())
 
-    def get_total_value(self, rates: dict, base_currency: str = "USD") -> float:
-        """Calculate total portfolio value in base currency."""
-        total = 0.0
+    def valuate(self, rates: dict, base_currency: str = "USD") -> tuple[list, float]:
+        """
+        Value every wallet in base currency in a single pass.
+
+        Returns:
+            tuple: ([(code, balance, value_or_None), ...], total)
+        """
         base = base_currency.upper()
+        rows = []
+        total = 0.0
 
         for code, wallet in self._wallets.items():
+            balance = wallet._balance
             if code == base:
-                total += wallet.balance
+                value = balance
             else:
-                rate_key = f"{code}_{base}"
-                if rate_key in rates and rates[rate_key].get("rate"):
-                    total += wallet.balance * rates[rate_key]["rate"]
+                rate = rates.get(get_pair_key(code, base), {}).get("rate")
+                value = balance * rate if rate else None
+
+            if value is not None:
+                total += value
+            rows.append((code, balance, value))
 
-        return total
+        return rows, total
+
+    def get_total_value(self, rates: dict, base_currency: str = "USD") -> float:
+        """Calculate total portfolio value in base currency."""
+        return self.valuate(rates, base_currency)[1]
 
     def to_dict(self) -> dict:
         """Convert portfolio to dictionary."""
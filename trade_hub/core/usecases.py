@@ -1,8 +1,13 @@
 """Business logic."""
 
+import atexit
+import logging
+import threading
+import time
 from datetime import datetime
+from functools import lru_cache
 
-from trade_hub.core.currencies import get_currency
+from trade_hub.core.currencies import get_currency, get_pair_key
 from trade_hub.core.exceptions import (
     AuthenticationError,
     CurrencyNotFoundError,
@@ -10,10 +15,84 @@ from trade_hub.core.exceptions import (
     ValidationError,
 )
 from trade_hub.core.models import Portfolio, User
-from trade_hub.decorators import log_action
+from trade_hub.decorators import log_action, ttl_cache
 from trade_hub.infra.database import db
 from trade_hub.infra.settings import settings
 
+logger = logging.getLogger("trade_hub")
+
+
+class PortfolioWriteCache:
+    """
+    Write-back buffer for portfolios changed during a session.
+
+    Holds latest state of each modified portfolio in memory so that
+    a burst of trades results in a single file write per user.
+    Buffered changes are written at most `max_age` seconds after the first one.
+    """
+
+    def __init__(self, max_age: float):
+        # {user_id: portfolio dict not yet written to storage}
+        self._dirty: dict[int, dict] = {}
+        self._max_age = max_age
+        # Background flush, armed by first change after a flush
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def _schedule_flush(self):
+        """Arm background flush if not armed yet (lock must be held)."""
+        if self._timer is None:
+            self._timer = threading.Timer(self._max_age, self._flush_in_background)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_in_background(self):
+        """Flush from timer thread; failed writes stay buffered and are retried."""
+        try:
+            self.flush()
+        except OSError as e:
+            logger.error("Failed to save buffered portfolios: %s", e)
+
+    def set(self, portfolio: Portfolio):
+        """Buffer portfolio state until next flush."""
+        with self._lock:
+            self._dirty[portfolio.user_id] = portfolio.to_dict()
+            self._schedule_flush()
+
+    def get(self, user_id: int) -> dict | None:
+        """Get buffered portfolio state if there are unsaved changes."""
+        return self._dirty.get(user_id)
+
+    def flush(self):
+        """
+        Persist all buffered portfolios to storage.
+
+        Portfolio stays buffered until its write succeeds; other portfolios
+        are still written if one fails, then first error is re-raised.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+            error = None
+            for user_id, portfolio_data in list(self._dirty.items()):
+                try:
+                    db.save_portfolio(user_id, portfolio_data)
+                except OSError as e:
+                    error = error or e
+                    continue
+                del self._dirty[user_id]
+
+            if error is not None:
+                # Retry failed writes later instead of waiting for logout or exit
+                self._schedule_flush()
+                raise error
+
+
+portfolio_cache = PortfolioWriteCache(max_age=settings.get("portfolio_flush_seconds"))
+atexit.register(portfolio_cache.flush)
+
 
 class UserSession:
     """Manages current user session."""
@@ -23,11 +102,13 @@ class UserSession:
     @classmethod
     def login(cls, user: User):
         """Set current logged in user."""
+        portfolio_cache.flush()
         cls._current_user = user
 
     @classmethod
     def logout(cls):
         """Clear current session."""
+        portfolio_cache.flush()
         cls._current_user = None
 
     @classmethod
@@ -50,13 +131,12 @@ def register_user(username: str, password: str) -> User:
         raise ValidationError("Password must be at least 4 characters long")
 
     username = username.strip()
-    users_data = db.load_users()
+    users_data, index, max_id = db.load_users_indexed()
 
-    for user_data in users_data:
-        if user_data["username"].lower() == username.lower():
-            raise ValidationError(f"Username '{username}' is already taken")
+    if username.casefold() in index:
+        raise ValidationError(f"Username '{username}' is already taken")
 
-    new_id = max((u["user_id"] for u in users_data), default=0) + 1
+    new_id = max_id + 1
 
     user = User(
         user_id=new_id,
@@ -68,10 +148,8 @@ def register_user(username: str, password: str) -> User:
     users_data.append(user.to_dict())
     db.save_users(users_data)
 
-    portfolios_data = db.load_portfolios()
     portfolio = Portfolio(user_id=new_id)
-    portfolios_data.append(portfolio.to_dict())
-    db.save_portfolios(portfolios_data)
+    db.save_portfolio(new_id, portfolio.to_dict())
 
     return user
 
@@ -79,100 +157,110 @@ def register_user(username: str, password: str) -> User:
 @log_action("LOGIN")
 def login_user(username: str, password: str) -> User:
     """Authenticate and login user."""
-    users_data = db.load_users()
+    users_data, index, _ = db.load_users_indexed()
 
-    for user_data in users_data:
-        if user_data["username"].lower() == username.lower():
-            user = User.from_dict(user_data)
-            if user.verify_password(password):
-                UserSession.login(user)
-                return user
-            else:
-                raise AuthenticationError("Invalid password")
+    i = index.get(username.casefold())
+    if i is None:
+        raise UserNotFoundError(username)
 
-    raise UserNotFoundError(username)
+    user = User.from_dict(users_data[i])
+    if not user.verify_password(password):
+        raise AuthenticationError("Invalid password")
 
+    if user.needs_rehash:
+        user.rehash_password(password)
+        users_data[i] = user.to_dict()
+        db.save_users(users_data)
 
-def get_portfolio(user_id: int) -> Portfolio:
-    """Get user portfolio."""
-    portfolios_data = db.load_portfolios()
+    UserSession.login(user)
+    return user
 
-    for portfolio_data in portfolios_data:
-        if portfolio_data["user_id"] == user_id:
-            return Portfolio.from_dict(portfolio_data)
 
+def get_portfolio(user_id: int) -> Portfolio:
+    """Get user portfolio."""
+    portfolio_data = portfolio_cache.get(user_id) or db.load_portfolio(user_id)
+    if portfolio_data:
+        return Portfolio.from_dict(portfolio_data)
     return Portfolio(user_id=user_id)
 
 
 def save_portfolio(portfolio: Portfolio):
-    """Save portfolio to storage."""
-    portfolios_data = db.load_portfolios()
-
-    for i, p in enumerate(portfolios_data):
-        if p["user_id"] == portfolio.user_id:
-            portfolios_data[i] = portfolio.to_dict()
-            break
-    else:
-        portfolios_data.append(portfolio.to_dict())
-
-    db.save_portfolios(portfolios_data)
+    """Save portfolio (written to storage within a few seconds, on logout, login or exit)."""
+    portfolio_cache.set(portfolio)
 
 
+@ttl_cache(seconds=settings.rates_ttl)
 def get_rates() -> dict:
-    """Get exchange rates from cache."""
+    """Get exchange rates from cache (kept in memory for rates TTL)."""
     return db.load_rates()
 
 
+def invalidate_rates_cache():
+    """Drop in-memory rates so next lookup reads fresh cache file."""
+    get_rates.cache_clear()
+    _rate_usd_cached.cache_clear()
+
+
+def valuate_portfolio(portfolio: Portfolio, base_currency: str = "USD") -> tuple[list, float]:
+    """Get per-wallet values and total of portfolio in base currency."""
+    return portfolio.valuate(get_rates(), base_currency)
+
+
 def get_rate(from_currency: str, to_currency: str) -> dict | None:
     """Get specific exchange rate."""
-    from_code = from_currency.strip().upper()
-    to_code = to_currency.strip().upper()
+    # Registry lookup validates and normalizes each code in one step
+    from_code = get_currency(from_currency).code
+    to_code = get_currency(to_currency).code
+    return get_rate_normalized(from_code, to_code)
 
-    # Validate currency codes exist in registry
-    get_currency(from_code)
-    get_currency(to_code)
 
+def get_rate_normalized(from_code: str, to_code: str) -> dict | None:
+    """Get exchange rate for codes already validated against registry."""
     if from_code == to_code:
         return {"rate": 1.0, "updated_at": datetime.now().isoformat()}
 
+    # In-memory snapshot of all cached pairs; lookups below are plain dict hits
     rates = get_rates()
-    rate_key = f"{from_code}_{to_code}"
-
-    # Check TTL
-    ttl = settings.rates_ttl
-
-    if rate_key in rates:
-        rate_data = rates[rate_key]
-        updated_at = rate_data.get("updated_at")
-        if updated_at:
-            try:
-                updated_time = datetime.fromisoformat(updated_at)
-                age = (datetime.now() - updated_time).total_seconds()
-                if age > ttl:
-                    pass  # Rate is stale, but we return it with warning
-            except (ValueError, TypeError):
-                pass
+
+    rate_data = rates.get(get_pair_key(from_code, to_code))
+    if rate_data is not None:
         return rate_data
 
-    reverse_key = f"{to_code}_{from_code}"
-    if reverse_key in rates and rates[reverse_key].get("rate"):
-        reverse_rate = rates[reverse_key]["rate"]
+    reverse_data = rates.get(get_pair_key(to_code, from_code))
+    if reverse_data and reverse_data.get("rate"):
         return {
-            "rate": 1.0 / reverse_rate,
-            "updated_at": rates[reverse_key].get("updated_at"),
+            "rate": 1.0 / reverse_data["rate"],
+            "updated_at": reverse_data.get("updated_at"),
         }
 
     raise CurrencyNotFoundError(f"{from_code}->{to_code}")
 
 
+@lru_cache(maxsize=128)
+def _rate_usd_cached(code: str, bucket: int) -> float | None:
+    """
+    Get USD rate of validated currency code for trade results.
+
+    Args:
+        code: Normalized currency code
+        bucket: Current time in whole seconds; entries age out as it changes
+
+    Returns:
+        float | None: Rate or None if pair is not in rates cache
+    """
+    try:
+        return get_rate_normalized(code, "USD")["rate"]
+    except CurrencyNotFoundError:
+        return None
+
+
 @log_action("BUY", verbose=True)
 def buy_currency(currency_code: str, amount: float) -> dict:
     """Buy specified currency."""
     if not UserSession.is_logged_in():
         raise PermissionError("Please login first")
 
-    code = currency_code.strip().upper()
-    get_currency(code)
+    code = get_currency(currency_code).code
 
     # Validate amount
     if not isinstance(amount, (int, float)) or amount <= 0:
@@ -189,13 +277,7 @@ def buy_currency(currency_code: str, amount: float) -> dict:
 
     save_portfolio(portfolio)
 
-    rate_info = None
-    try:
-        rate_info = get_rate(code, "USD")
-    except CurrencyNotFoundError:
-        pass
-
-    rate = rate_info["rate"] if rate_info else None
+    rate = _rate_usd_cached(code, int(time.time()))
     estimated_value = amount * rate if rate else None
 
     return {
@@ -214,8 +296,7 @@ def sell_currency(currency_code: str, amount: float) -> dict:
     if not UserSession.is_logged_in():
         raise PermissionError("Please login first")
 
-    code = currency_code.strip().upper()
-    get_currency(code)
+    code = get_currency(currency_code).code
 
     if not isinstance(amount, (int, float)) or amount <= 0:
         raise ValidationError("Amount must be a positive number")
@@ -237,13 +318,7 @@ def sell_currency(currency_code: str, amount: float) -> dict:
 
     save_portfolio(portfolio)
 
-    rate_info = None
-    try:
-        rate_info = get_rate(code, "USD")
-    except CurrencyNotFoundError:
-        pass
-
-    rate = rate_info["rate"] if rate_info else None
+    rate = _rate_usd_cached(code, int(time.time()))
     estimated_value = amount * rate if rate else None
 
     return {
@@ -1,14 +1,23 @@
 """Utility functions."""
 
+import re
+
+from trade_hub.core.currencies import CRYPTO_CODES
 from trade_hub.core.exceptions import ValidationError
 
+# Common shape of valid codes; anything else goes through the detailed checks
+_CURRENCY_CODE_RE = re.compile(r"[A-Z0-9]{2,5}")
+_CRYPTO_CODES = frozenset(CRYPTO_CODES)
+
 
 def validate_currency_code(code: str) -> str:
     """Validate and normalize currency code."""
-    if not code or not code.strip():
-        raise ValidationError("Currency code cannot be empty")
+    code = code.strip().upper() if code else ""
+    if _CURRENCY_CODE_RE.fullmatch(code):
+        return code
 
-    code = code.strip().upper()
+    if not code:
+        raise ValidationError("Currency code cannot be empty")
 
     if len(code) < 2 or len(code) > 5:
         raise ValidationError("Currency code must be 2-5 characters")
@@ -50,6 +59,6 @@ def validate_password(password: str) -> str:
 
 def format_currency_amount(amount: float, code: str) -> str:
     """Format currency amount for display."""
-    if code in ("BTC", "ETH", "LTC", "XRP", "DOGE"):
+    if code in _CRYPTO_CODES:
         return f"{amount:.8f} {code}"
     return f"{amount:.2f} {code}"
@@ -2,9 +2,13 @@
 
 import functools
 import logging
+import time
 
 logger = logging.getLogger("trade_hub")
 
+# Bound on first use: usecases imports this module, so it can't be imported at load time
+_UserSession = None
+
 
 def log_action(action_name: str = None, verbose: bool = False):
     """
@@ -21,49 +25,102 @@ def log_action(action_name: str = None, verbose: bool = False):
     """
 
     def decorator(func):
+        name = action_name or func.__name__.upper()
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            name = action_name or func.__name__.upper()
-
-            # Extract relevant info from kwargs
-            username = kwargs.get("username", "N/A")
-            user_id = kwargs.get("user_id", "N/A")
-            currency = kwargs.get("currency_code", kwargs.get("currency", "N/A"))
-            amount = kwargs.get("amount", "N/A")
-
-            # Build log message parts
-            log_parts = [
-                f"{name}",
-                f"user='{username if username != 'N/A' else user_id}'",
-            ]
-
-            if currency != "N/A":
-                log_parts.append(f"currency='{currency}'")
-            if amount != "N/A":
-                log_parts.append(f"amount={amount}")
-
             try:
                 result = func(*args, **kwargs)
+            except Exception as e:
+                fmt_parts, log_args, extra = _build_log_record(name, kwargs)
+                fmt_parts += ["result=ERROR", "error_type=%s", "error_message='%s'"]
+                log_args += [type(e).__name__, e]
+                extra.update(result="ERROR", error_type=type(e).__name__, error_message=str(e))
+                logger.error(" ".join(fmt_parts), *log_args, extra=extra)
+                raise
+
+            # Skip building the record when INFO records would be discarded
+            if logger.isEnabledFor(logging.INFO):
+                fmt_parts, log_args, extra = _build_log_record(name, kwargs)
 
                 # Add result info for verbose mode
                 if verbose and isinstance(result, dict):
                     rate = result.get("rate")
                     if rate:
-                        log_parts.append(f"rate={rate:.2f}")
-                        log_parts.append("base='USD'")
+                        fmt_parts += ["rate=%.2f", "base='USD'"]
+                        log_args.append(rate)
+                        extra.update(rate=rate, base="USD")
 
-                log_parts.append("result=OK")
-                logger.info(" ".join(log_parts))
+                fmt_parts.append("result=OK")
+                extra["result"] = "OK"
+                logger.info(" ".join(fmt_parts), *log_args, extra=extra)
 
-                return result
+            return result
 
-            except Exception as e:
-                log_parts.append("result=ERROR")
-                log_parts.append(f"error_type={type(e).__name__}")
-                log_parts.append(f"error_message='{str(e)}'")
-                logger.error(" ".join(log_parts))
-                raise
+        return wrapper
+
+    return decorator
+
+
+def _build_log_record(name: str, kwargs: dict) -> tuple[list[str], list, dict]:
+    """
+    Build common part of operation log record from call kwargs.
 
+    Values are passed to logging as arguments, so the message is
+    only formatted when a handler actually emits it.
+
+    Returns:
+        tuple: (format parts, format arguments, structured fields for `extra`)
+    """
+    # Extract relevant info from kwargs
+    username = kwargs.get("username", "N/A")
+    user = username if username != "N/A" else kwargs.get("user_id", "N/A")
+    currency = kwargs.get("currency_code", kwargs.get("currency", "N/A"))
+    amount = kwargs.get("amount", "N/A")
+
+    fmt_parts = ["%s", "user='%s'"]
+    log_args = [name, user]
+    extra = {"action": name, "user": user}
+
+    if currency != "N/A":
+        fmt_parts.append("currency='%s'")
+        log_args.append(currency)
+        extra["currency"] = currency
+    if amount != "N/A":
+        fmt_parts.append("amount=%s")
+        log_args.append(amount)
+        extra["amount"] = amount
+
+    return fmt_parts, log_args, extra
+
+
+def ttl_cache(seconds: float):
+    """
+    Decorator caching result of argument-less function for a time window.
+
+    Cached value is recomputed after `seconds` have passed
+    or after explicit `cache_clear()` call on the wrapped function.
+
+    Args:
+        seconds: Time to live of cached value
+    """
+
+    def decorator(func):
+        state = {"expires_at": None, "value": None}
+
+        @functools.wraps(func)
+        def wrapper():
+            now = time.monotonic()
+            if state["expires_at"] is None or now >= state["expires_at"]:
+                state["value"] = func()
+                state["expires_at"] = now + seconds
+            return state["value"]
+
+        def cache_clear():
+            state["expires_at"] = None
+            state["value"] = None
+
+        wrapper.cache_clear = cache_clear
         return wrapper
 
     return decorator
@@ -74,9 +131,13 @@ def require_login(func):
 
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
-        from trade_hub.core.usecases import UserSession
+        global _UserSession
+        if _UserSession is None:
+            from trade_hub.core.usecases import UserSession
+
+            _UserSession = UserSession
 
-        if not UserSession.is_logged_in():
+        if not _UserSession.is_logged_in():
             raise PermissionError("Please login first")
         return func(*args, **kwargs)
 
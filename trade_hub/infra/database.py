@@ -1,11 +1,16 @@
 """Database manager for JSON storage."""
 
-import json
+import mmap
 from pathlib import Path
 from typing import Any
 
+import orjson
+
 from trade_hub.infra.settings import settings
 
+# Files at least this large are parsed straight from a memory map
+MMAP_MIN_SIZE = 64 * 1024
+
 
 class DatabaseManager:
     """
@@ -13,6 +18,7 @@ class DatabaseManager:
 
     Uses __new__ pattern for singleton implementation.
     Provides atomic read/write operations for data files.
+    Parsed files are cached in memory until their mtime changes.
     """
 
     _instance = None
@@ -26,6 +32,10 @@ class DatabaseManager:
     def __init__(self):
         if DatabaseManager._initialized:
             return
+        # {filename: (mtime_ns, parsed data)}
+        self._cache: dict[str, tuple[int, Any]] = {}
+        # (users list, {casefolded username: position}, max user_id)
+        self._users_index = None
         self._ensure_data_dir()
         DatabaseManager._initialized = True
 
@@ -38,57 +48,149 @@ class DatabaseManager:
         return settings.data_dir / filename
 
     def load(self, filename: str) -> list | dict:
-        """Load data from JSON file."""
+        """
+        Load data from JSON file.
+
+        Returned object is shared with the in-memory cache:
+        callers that modify it must pass it to save().
+        """
         filepath = self._get_filepath(filename)
-        if not filepath.exists():
+        try:
+            stat = filepath.stat()
+        except OSError:
             return [] if "rates" not in filename else {}
+        mtime = stat.st_mtime_ns
+
+        cached = self._cache.get(filename)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
         try:
-            with open(filepath, encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError):
+            if stat.st_size >= MMAP_MIN_SIZE:
+                data = self._load_mapped(filepath)
+            else:
+                data = orjson.loads(filepath.read_bytes())
+        # JSONDecodeError is a ValueError, as is mmap of a file emptied meanwhile
+        except (ValueError, OSError):
             return [] if "rates" not in filename else {}
 
+        self._cache[filename] = (mtime, data)
+        return data
+
+    @staticmethod
+    def _load_mapped(filepath: Path) -> Any:
+        """Parse JSON file from memory map without copying it into bytes."""
+        with open(filepath, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    return orjson.loads(view)
+
+    def invalidate(self, filename: str = None):
+        """Drop cached data for file (or for all files)."""
+        if filename is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(filename, None)
+
     def save(self, filename: str, data: Any):
         """
         Save data to JSON file with atomic write.
         Uses temporary file and rename for atomicity.
         """
-        self._ensure_data_dir()
         filepath = self._get_filepath(filename)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
         temp_filepath = filepath.with_suffix(".tmp")
 
         try:
-            with open(temp_filepath, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            temp_filepath.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
             temp_filepath.replace(filepath)
         except OSError as e:
+            self.invalidate(filename)
             if temp_filepath.exists():
                 temp_filepath.unlink()
             raise e
 
+        self._cache[filename] = (filepath.stat().st_mtime_ns, data)
+
     def load_users(self) -> list:
         """Load users data."""
-        return self.load(settings.get("users_file"))
+        return self.load(settings.users_file)
+
+    def load_users_indexed(self) -> tuple[list, dict, int]:
+        """
+        Load users data with username lookup index.
+
+        Index is cached until users data is reloaded from file.
+
+        Returns:
+            tuple: (users, {casefolded username: position in users}, max user_id)
+        """
+        users = self.load_users()
+
+        if self._users_index is None or self._users_index[0] is not users:
+            index = {}
+            for i, user_data in enumerate(users):
+                # Records written before "username_lower" existed get it on next save
+                key = user_data.get("username_lower")
+                if key is None:
+                    key = user_data["username_lower"] = user_data["username"].casefold()
+                index.setdefault(key, i)
+            max_id = max((u["user_id"] for u in users), default=0)
+            self._users_index = (users, index, max_id)
+
+        return users, self._users_index[1], self._users_index[2]
 
     def save_users(self, data: list):
         """Save users data."""
-        self.save(settings.get("users_file"), data)
+        self.save(settings.users_file, data)
+        self._users_index = None
+
+    def load_portfolios(self) -> dict:
+        """
+        Load legacy shared portfolios data keyed by str(user_id).
+
+        Old list format is converted on first load; the converted dict
+        replaces the list in memory cache only, the file is never rewritten.
+        """
+        filename = settings.portfolios_file
+        data = self.load(filename)
+        if isinstance(data, list):
+            data = {str(p["user_id"]): p for p in data}
+            cached = self._cache.get(filename)
+            if cached is not None:
+                self._cache[filename] = (cached[0], data)
+        return data
+
+    def _get_portfolio_filename(self, user_id: int) -> str:
+        """Get per-user portfolio file name relative to data directory."""
+        return f"{settings.portfolios_dir}/{user_id}.json"
+
+    def load_portfolio(self, user_id: int) -> dict | None:
+        """
+        Load portfolio of single user.
+
+        Falls back to legacy shared portfolios file
+        if user portfolio was not saved to its own file yet.
+        """
+        data = self.load(self._get_portfolio_filename(user_id))
+        if data:
+            return data
 
-    def load_portfolios(self) -> list:
-        """Load portfolios data."""
-        return self.load(settings.get("portfolios_file"))
+        return self.load_portfolios().get(str(user_id))
 
-    def save_portfolios(self, data: list):
-        """Save portfolios data."""
-        self.save(settings.get("portfolios_file"), data)
+    def save_portfolio(self, user_id: int, data: dict):
+        """Save portfolio of single user to its own file."""
+        self.save(self._get_portfolio_filename(user_id), data)
 
     def load_rates(self) -> dict:
-        """Load rates data."""
-        return self.load(settings.get("rates_file"))
+        """Load rates data as {pair: rate data}."""
+        data = self.load(settings.rates_file)
+        # Parser service keeps pairs under "pairs"; older files are flat
+        return data.get("pairs", data)
 
     def save_rates(self, data: dict):
         """Save rates data."""
-        self.save(settings.get("rates_file"), data)
+        self.save(settings.rates_file, data)
 
 
 # Global instance for easy access
@@ -16,7 +16,9 @@ class SettingsLoader:
     DEFAULTS = {
         "data_dir": "data",
         "users_file": "users.json",
-        "portfolios_file": "portfolios.json",
+        "portfolios_file": "portfolios.json",  # legacy shared file, read-only fallback
+        "portfolios_dir": "portfolios",
+        "portfolio_flush_seconds": 2,  # max delay of buffered portfolio writes
         "rates_file": "rates.json",
         "rates_ttl_seconds": 300,  # 5 minutes
         "default_base_currency": "USD",
@@ -38,6 +40,7 @@ class SettingsLoader:
             return
         self._config = dict(self.DEFAULTS)
         self._load_config()
+        self._cache_values()
         SettingsLoader._initialized = True
 
     def _load_config(self):
@@ -51,6 +54,17 @@ class SettingsLoader:
             except (json.JSONDecodeError, OSError):
                 pass
 
+    def _cache_values(self):
+        """Resolve frequently used values once per config load."""
+        project_root = Path(__file__).parent.parent.parent
+        self._data_dir = project_root / self.get("data_dir")
+        self._log_dir = project_root / self.get("log_dir")
+        self._rates_ttl = int(self.get("rates_ttl_seconds"))
+        self.users_file = self.get("users_file")
+        self.portfolios_file = self.get("portfolios_file")
+        self.portfolios_dir = self.get("portfolios_dir")
+        self.rates_file = self.get("rates_file")
+
     def get(self, key: str, default: Any = None) -> Any:
         """Get configuration value by key."""
         return self._config.get(key, default if default is not None else self.DEFAULTS.get(key))
@@ -59,16 +73,17 @@ class SettingsLoader:
         """Reload configuration from file."""
         self._config = dict(self.DEFAULTS)
         self._load_config()
+        self._cache_values()
 
     @property
     def data_dir(self) -> Path:
         """Get data directory path."""
-        return Path(__file__).parent.parent.parent / self.get("data_dir")
+        return self._data_dir
 
     @property
     def rates_ttl(self) -> int:
         """Get rates TTL in seconds."""
-        return self.get("rates_ttl_seconds")
+        return self._rates_ttl
 
     @property
     def default_base_currency(self) -> str:
@@ -78,7 +93,7 @@ class SettingsLoader:
     @property
     def log_dir(self) -> Path:
         """Get log directory path."""
-        return Path(__file__).parent.parent.parent / self.get("log_dir")
+        return self._log_dir
 
 
 settings = SettingsLoader()
@@ -4,8 +4,11 @@ import logging
 import time
 from abc import ABC, abstractmethod
 from datetime import datetime, timezone
+from types import MappingProxyType
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from trade_hub.core.exceptions import ApiRequestError
 from trade_hub.parser_service.config import parser_config
@@ -13,9 +16,82 @@ from trade_hub.parser_service.config import parser_config
 logger = logging.getLogger("trade_hub.parser")
 
 
+def _create_session() -> requests.Session:
+    """
+    Create HTTP session shared by API clients.
+
+    Keeps connections alive between scheduled updates and retries
+    transient server failures. After the last retry the response is
+    returned as is, so status codes are still reported by the clients.
+    429 is not retried: waiting out Retry-After here would block the
+    command, so the clients report the rate limit right away. Read
+    timeouts are not retried either: each retry would wait the full
+    timeout again, and they still surface as requests' Timeout.
+    """
+    retry = Retry(
+        total=2,
+        read=False,
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        respect_retry_after_header=False,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+# Returned by fetch_rates when server reports data unchanged since last fetch (HTTP 304)
+NOT_MODIFIED = MappingProxyType({})
+
+
 class BaseApiClient(ABC):
     """Abstract base class for API clients."""
 
+    # Shared by all clients: requests go through one connection pool
+    _session = _create_session()
+
+    def __init__(self):
+        # Validators of last successfully parsed response, sent back on next fetch
+        self._etag: str | None = None
+        self._last_modified: str | None = None
+        # Validators of last parsed response, committed once its rates are stored
+        self._pending_validators: tuple[str | None, str | None] | None = None
+
+    def _get(self, url: str) -> requests.Response:
+        """GET url conditionally: server may answer 304 if data didn't change."""
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+        return self._session.get(url, timeout=parser_config.REQUEST_TIMEOUT, headers=headers)
+
+    def _remember_validators(self, response: requests.Response):
+        """Stage ETag/Last-Modified of response until commit_validators is called."""
+        self._pending_validators = (
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+        )
+
+    def commit_validators(self):
+        """
+        Use validators of last fetched response for next conditional request.
+
+        Call only after its rates are stored: otherwise a later 304 would
+        report rates as current that were never saved.
+        """
+        if self._pending_validators is not None:
+            self._etag, self._last_modified = self._pending_validators
+            self._pending_validators = None
+
+    def reset_validators(self):
+        """Forget validators so next fetch is unconditional and returns full data."""
+        self._etag = self._last_modified = None
+        self._pending_validators = None
+
     @abstractmethod
     def fetch_rates(self) -> dict:
         """
@@ -23,6 +99,7 @@ class BaseApiClient(ABC):
 
         Returns:
             dict: Rates in format {"BTC_USD": {"rate": 59337.21, ...}, ...}
+                  or NOT_MODIFIED if server reports no change since last fetch
         """
         pass
 
@@ -43,15 +120,19 @@ class CoinGeckoClient(BaseApiClient):
     def fetch_rates(self) -> dict:
         """Fetch cryptocurrency rates from CoinGecko."""
         url = parser_config.get_coingecko_url()
-        base = parser_config.BASE_CURRENCY.lower()
+        base = parser_config.BASE_CURRENCY
+        base_lower = base.lower()
 
         logger.info(f"Fetching rates from CoinGecko: {url}")
         start_time = time.time()
 
         try:
-            response = requests.get(url, timeout=parser_config.REQUEST_TIMEOUT)
+            response = self._get(url)
             request_ms = int((time.time() - start_time) * 1000)
 
+            if response.status_code == 304:
+                logger.info(f"CoinGecko: not modified ({request_ms}ms)")
+                return NOT_MODIFIED
             if response.status_code == 429:
                 raise ApiRequestError("Rate limit exceeded (429). Try again later.")
             if response.status_code != 200:
@@ -63,24 +144,25 @@ class CoinGeckoClient(BaseApiClient):
             timestamp = datetime.now(timezone.utc).isoformat()
 
             rates = {}
-            # Reverse map: coingecko_id -> ticker
-            id_to_ticker = {v: k for k, v in parser_config.CRYPTO_ID_MAP.items()}
+            id_to_ticker = parser_config.CRYPTO_ID_TO_TICKER
+            source = self.source_name
+            status_code = response.status_code
 
             for coin_id, values in data.items():
-                if coin_id in id_to_ticker and base in values:
-                    ticker = id_to_ticker[coin_id]
-                    rate_key = f"{ticker}_{parser_config.BASE_CURRENCY}"
-                    rates[rate_key] = {
-                        "rate": values[base],
+                ticker = id_to_ticker.get(coin_id)
+                if ticker is not None and base_lower in values:
+                    rates[f"{ticker}_{base}"] = {
+                        "rate": values[base_lower],
                         "updated_at": timestamp,
-                        "source": self.source_name,
+                        "source": source,
                         "meta": {
                             "raw_id": coin_id,
                             "request_ms": request_ms,
-                            "status_code": response.status_code,
+                            "status_code": status_code,
                         },
                     }
 
+            self._remember_validators(response)
             logger.info(f"CoinGecko: fetched {len(rates)} rates in {request_ms}ms")
             return rates
 
@@ -112,9 +194,12 @@ class ExchangeRateApiClient(BaseApiClient):
         start_time = time.time()
 
         try:
-            response = requests.get(url, timeout=parser_config.REQUEST_TIMEOUT)
+            response = self._get(url)
             request_ms = int((time.time() - start_time) * 1000)
 
+            if response.status_code == 304:
+                logger.info(f"ExchangeRate-API: not modified ({request_ms}ms)")
+                return NOT_MODIFIED
             if response.status_code == 401:
                 raise ApiRequestError("Invalid API key for ExchangeRate-API")
             if response.status_code == 429:
@@ -152,6 +237,7 @@ class ExchangeRateApiClient(BaseApiClient):
                         },
                     }
 
+            self._remember_validators(response)
             logger.info(f"ExchangeRate-API: fetched {len(rates)} rates in {request_ms}ms")
             return rates
 
@@ -2,6 +2,7 @@
 
 import os
 from dataclasses import dataclass, field
+from functools import cached_property
 from pathlib import Path
 
 
@@ -36,6 +37,11 @@ class ParserConfig:
         "DOGE": "dogecoin",
     })
 
+    @cached_property
+    def CRYPTO_ID_TO_TICKER(self) -> dict:
+        """Reverse of CRYPTO_ID_MAP: CoinGecko ID -> ticker."""
+        return {coin_id: ticker for ticker, coin_id in self.CRYPTO_ID_MAP.items()}
+
     # File paths
     DATA_DIR: Path = field(
         default_factory=lambda: Path(__file__).parent.parent.parent / "data"
@@ -48,7 +54,12 @@ class ParserConfig:
 
     @property
     def history_file_path(self) -> Path:
-        """Path to exchange_rates.json history file."""
+        """Path to history.jsonl history file (one entry per line)."""
+        return self.DATA_DIR / "history.jsonl"
+
+    @property
+    def legacy_history_file_path(self) -> Path:
+        """Path to exchange_rates.json history file of older versions."""
         return self.DATA_DIR / "exchange_rates.json"
 
     # Network parameters
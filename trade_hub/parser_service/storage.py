@@ -1,123 +1,298 @@
 """Rates storage."""
 
-import json
+import itertools
 import logging
+import os
+import secrets
+from collections.abc import Iterable, Iterator
 from datetime import datetime, timezone
 from pathlib import Path
 
+import orjson
+
+from trade_hub.core.currencies import get_pair_key
 from trade_hub.parser_service.config import parser_config
 
 logger = logging.getLogger("trade_hub.parser")
 
-
 class RatesStorage:
     """Handles reading and writing of exchange rates files."""
 
     def __init__(self, rates_path: Path = None, history_path: Path = None):
         self.rates_path = rates_path or parser_config.rates_file_path
         self.history_path = history_path or parser_config.history_file_path
-        self._ensure_data_dir()
+        # Display rows and the parsed "pairs" dict they were built from
+        self._rate_rows: list[tuple] = []
+        self._rate_rows_pairs: dict | None = None
+        # Parsed rates file and its mtime; reused until file changes
+        self._rates_cache: dict | None = None
+        self._rates_mtime: int = -1
+        # (from, to, timestamp) of entries in history file; read once on first save_to_history
+        self._history_ids: set[tuple[str, str, str]] | None = None
+        # Directories already created by this instance; checked on first write only
+        self._ensured_dirs: set[Path] = set()
 
-    def _ensure_data_dir(self):
-        """Ensure data directory exists."""
-        self.rates_path.parent.mkdir(parents=True, exist_ok=True)
+    def _ensure_data_dir(self, path: Path):
+        """Ensure directory of file about to be written exists."""
+        directory = path.parent
+        if directory not in self._ensured_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(directory)
+
+    def _atomic_write(self, path: Path, data: dict, durable: bool = False, *, indent: bool = False):
+        """
+        Write data atomically using temp file and rename.
 
-    def _atomic_write(self, path: Path, data: dict):
-        """Write data atomically using temp file and rename."""
-        temp_path = path.with_suffix(".tmp")
+        Args:
+            path: Destination file
+            data: JSON-serializable data
+            durable: Fsync file and directory so write survives power loss
+            indent: Pretty-print with 2-space indent (compact by default)
+        """
+        # Unique temp file per call: concurrent writers never share it
+        self._ensure_data_dir(path)
+        temp_name = path.parent / f"{path.name}.{secrets.token_hex(6)}.tmp"
+        # 0o666 is narrowed by umask, as for any new file (mkstemp would force 0600)
+        fd = os.open(temp_name, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
         try:
-            with open(temp_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            temp_path.replace(path)
-        except OSError as e:
-            if temp_path.exists():
-                temp_path.unlink()
-            raise e
+            with os.fdopen(fd, "wb") as f:
+                # Keep mode of replaced file
+                if os.chmod in os.supports_fd:
+                    try:
+                        os.chmod(f.fileno(), os.stat(path).st_mode & 0o777)
+                    except FileNotFoundError:
+                        pass
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else None))
+                if durable:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(temp_name, path)
+        except Exception:
+            # Also covers encode errors, which used to leave temp file behind
+            temp_name.unlink(missing_ok=True)
+            raise
+
+        if durable:
+            dir_fd = os.open(path.parent, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
 
     def load_rates(self) -> dict:
-        """Load current rates from cache file."""
-        if not self.rates_path.exists():
-            return {"pairs": {}, "last_refresh": None}
+        """
+        Load current rates from cache file.
+
+        Parsed data is kept in memory until file mtime changes;
+        returned dict is shared and must not be modified by callers.
+        """
         try:
-            with open(self.rates_path, encoding="utf-8") as f:
-                data = json.load(f)
+            mtime = self.rates_path.stat().st_mtime_ns
+        except OSError:
+            return {"pairs": {}, "last_refresh": None}
+
+        if self._rates_cache is not None and mtime == self._rates_mtime:
+            return self._rates_cache
 
-                if "pairs" not in data:
-                    return {"pairs": data, "last_refresh": data.get("last_refresh")}
-                return data
-        except (json.JSONDecodeError, OSError):
+        try:
+            data = orjson.loads(self.rates_path.read_bytes())
+        except (orjson.JSONDecodeError, OSError):
             return {"pairs": {}, "last_refresh": None}
 
-    def save_rates(self, rates: dict):
+        if "pairs" not in data:
+            return self._migrate_legacy_rates(data, mtime)
+
+        self._rates_cache = data
+        self._rates_mtime = mtime
+        return data
+
+    @staticmethod
+    def _refresh_due(data: dict, now: datetime, max_age: float | None) -> bool:
+        """Check if last_refresh of rates data is missing or older than max_age seconds."""
+        if max_age is None:
+            return False
+        try:
+            refreshed = datetime.fromisoformat(data["last_refresh"])
+        except (KeyError, TypeError, ValueError):
+            return True
+        return (now - refreshed).total_seconds() >= max_age
+
+    def _migrate_legacy_rates(self, legacy: dict, mtime: int) -> dict:
+        """
+        Rewrite rates file of older versions in canonical "pairs" format.
+
+        Runs once per legacy file: later loads parse canonical data.
+        If file can't be rewritten, converted data is only cached in memory.
+        """
+        # Legacy flat format: pairs are mixed with "source"/"last_refresh" strings
+        data = {
+            "pairs": {key: value for key, value in legacy.items() if isinstance(value, dict)},
+            "source": legacy.get("source", "ParserService"),
+            "last_refresh": legacy.get("last_refresh"),
+        }
+        try:
+            self._atomic_write(self.rates_path, data)
+            mtime = self.rates_path.stat().st_mtime_ns
+            logger.info(f"Migrated {self.rates_path} to pairs format")
+        except OSError as e:
+            logger.warning(f"Could not migrate {self.rates_path}: {e}")
+
+        self._rates_cache = data
+        self._rates_mtime = mtime
+        return data
+
+    def save_rates(self, rates: dict, max_age: float | None = None) -> bool:
         """
         Save rates to cache file.
 
+        File is not rewritten if merge leaves rate and source of every pair
+        unchanged (clients stamp updated_at with fetch time, so it differs on
+        every fetch), unless its last_refresh is older than max_age.
+
         Args:
             rates: Dict with rate data in format:
                    {"BTC_USD": {"rate": 59337.21, "updated_at": "...", "source": "..."}, ...}
+            max_age: Seconds after which unchanged rates are still written,
+                     so file timestamps show the latest refresh
+
+        Returns:
+            bool: True if file was written
         """
         current = self.load_rates()
-        pairs = current.get("pairs", {})
+        current_pairs = current.get("pairs", {})
+        # Copy so cached data stays intact if write fails
+        pairs = dict(current_pairs)
 
-        for key, value in rates.items():
-            existing = pairs.get(key, {})
-            existing_time = existing.get("updated_at", "")
-            new_time = value.get("updated_at", "")
-
-            if new_time >= existing_time:
-                pairs[key] = {
-                    "rate": value["rate"],
-                    "updated_at": value["updated_at"],
-                    "source": value.get("source", "unknown"),
-                }
-
-        timestamp = datetime.now(timezone.utc).isoformat()
-
-        legacy_data = {}
-        for key, value in pairs.items():
-            legacy_data[key] = {
+        # Take incoming rate unless cached one is newer
+        pairs_get = pairs.get
+        pairs.update({
+            key: {
                 "rate": value["rate"],
                 "updated_at": value["updated_at"],
+                "source": value.get("source", "unknown"),
             }
-        legacy_data["source"] = "ParserService"
-        legacy_data["last_refresh"] = timestamp
+            for key, value in rates.items()
+            if value.get("updated_at", "") >= pairs_get(key, {}).get("updated_at", "")
+        })
 
-        self._atomic_write(self.rates_path, legacy_data)
+        now = datetime.now(timezone.utc)
+        timestamp = now.isoformat()
+
+        def rate_source(pair):
+            return (pair.get("rate"), pair.get("source")) if pair else None
+
+        if all(rate_source(pairs.get(key)) == rate_source(current_pairs.get(key))
+               for key in rates) and not self._refresh_due(current, now, max_age):
+            logger.info("Rates unchanged, skipped writing")
+            return False
+
+        data = {"pairs": pairs, "source": "ParserService", "last_refresh": timestamp}
+        # Rates cache is regenerated on next update: skip fsync cost
+        self._atomic_write(self.rates_path, data, durable=False)
+        self._rates_cache = data
+        self._rates_mtime = self.rates_path.stat().st_mtime_ns
         logger.info(f"Saved {len(pairs)} rates to {self.rates_path}")
+        return True
 
-    def load_history(self) -> list:
-        """Load historical rates from history file."""
-        if not self.history_path.exists():
-            return []
+    def _append_lines(self, path: Path, entries: Iterable[dict]) -> int:
+        """
+        Append entries to JSON Lines file, one object per line.
+
+        Entries are serialized and written one by one as they are produced.
+
+        Returns:
+            int: Number of entries written
+        """
+        self._ensure_data_dir(path)
+        count = 0
+        with open(path, "a+b") as f:
+            # Terminate a line torn by interrupted write so it doesn't swallow ours
+            if f.tell() > 0:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            for entry in entries:
+                f.write(orjson.dumps(entry) + b"\n")
+                count += 1
+        return count
+
+    def _migrate_legacy_history(self):
+        """Move entries of legacy JSON array history file to JSON Lines file."""
+        legacy_path = parser_config.legacy_history_file_path
+        if self.history_path.exists() or not legacy_path.exists():
+            return
+        try:
+            entries = orjson.loads(legacy_path.read_bytes())
+        except (orjson.JSONDecodeError, OSError):
+            return
+        if entries:
+            self._append_lines(self.history_path, entries)
+            logger.info(f"Migrated {len(entries)} history entries to {self.history_path}")
+
+    def load_history(self) -> Iterator[dict]:
+        """Stream historical rates from history file, one entry per line."""
         try:
-            with open(self.history_path, encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, OSError):
-            return []
+            f = open(self.history_path, "rb")
+        except OSError:
+            return
+        with f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # Torn line left by interrupted append
+                    continue
 
     def save_to_history(self, rates: dict):
         """
         Append rates to history file.
 
         Each rate entry gets a unique ID based on currency pair and timestamp.
+        Only new entries are written; existing lines are never rewritten.
         """
-        history = self.load_history()
-        existing_ids = {entry.get("id") for entry in history}
+        if not rates:
+            return
+
+        if self._history_ids is None:
+            self._migrate_legacy_history()
+            self._history_ids = {
+                (entry.get("from_currency"), entry.get("to_currency"), entry.get("timestamp"))
+                for entry in self.load_history()
+            }
+        entries = self._iter_new_entries(rates, self._history_ids)
+        first = next(entries, None)
+        if first is None:
+            return
+
+        try:
+            count = self._append_lines(self.history_path, itertools.chain((first,), entries))
+        except OSError:
+            # Ids of unwritten entries were already added: re-read file next time
+            self._history_ids = None
+            raise
+        logger.info(f"Added {count} entries to history")
+
+    @staticmethod
+    def _iter_new_entries(rates: dict, existing_ids: set) -> Iterator[dict]:
+        """Yield history entries for rates not in history yet, recording their ids."""
+        # Fallback for entries without own timestamp, taken once per call
+        fallback_ts = datetime.now(timezone.utc).isoformat()
 
-        new_entries = []
         for key, value in rates.items():
             parts = key.split("_")
             if len(parts) != 2:
                 continue
 
             from_curr, to_curr = parts
-            timestamp = value.get("updated_at", datetime.now(timezone.utc).isoformat())
+            timestamp = value.get("updated_at") or fallback_ts
 
-            entry_id = f"{from_curr}_{to_curr}_{timestamp}"
+            entry_key = (from_curr, to_curr, timestamp)
 
-            if entry_id not in existing_ids:
+            if entry_key not in existing_ids:
                 entry = {
-                    "id": entry_id,
+                    "id": "_".join(entry_key),
                     "from_currency": from_curr,
                     "to_currency": to_curr,
                     "rate": value["rate"],
@@ -125,29 +300,35 @@ class RatesStorage:
                     "source": value.get("source", "unknown"),
                     "meta": value.get("meta", {}),
                 }
-                new_entries.append(entry)
-                existing_ids.add(entry_id)
-
-        if new_entries:
-            history.extend(new_entries)
-            self._atomic_write(self.history_path, history)
-            logger.info(f"Added {len(new_entries)} entries to history")
+                existing_ids.add(entry_key)
+                yield entry
 
     def get_rate(self, from_currency: str, to_currency: str):
         """Get specific rate from cache."""
-        rates = self.load_rates()
-        pairs = rates.get("pairs", rates)  # Handle both formats
-        key = f"{from_currency.upper()}_{to_currency.upper()}"
-        return pairs.get(key)
+        # Cached parse; legacy flat files are unwrapped into "pairs" on load
+        pairs = self.load_rates()["pairs"]
+        return pairs.get(get_pair_key(from_currency.upper(), to_currency.upper()))
 
     def get_all_rates(self) -> dict:
         """Get all rates from cache."""
-        data = self.load_rates()
-        if "pairs" in data:
-            return data["pairs"]
-        result = {}
-        for k, v in data.items():
-            if isinstance(v, dict) and "rate" in v:
-                result[k] = v
-        return result
+        return self.load_rates()["pairs"]
+
+    def get_rate_rows(self) -> list[tuple]:
+        """
+        Get cached rates as flat rows for display.
+
+        Rows are rebuilt whenever load_rates parses the file anew, i.e. after
+        a save or a change by another writer.
 
+        Returns:
+            list: [(pair, rate, source, updated_at), ...]
+        """
+        pairs = self.get_all_rates()
+        if pairs is not self._rate_rows_pairs:
+            self._rate_rows = [
+                (pair, data["rate"], data.get("source", "N/A"), data.get("updated_at", "N/A"))
+                for pair, data in pairs.items()
+                if isinstance(data, dict) and "rate" in data
+            ]
+            self._rate_rows_pairs = pairs
+        return self._rate_rows
@@ -1,10 +1,13 @@
 """Rates updater."""
 
 import logging
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
 
 from trade_hub.core.exceptions import ApiRequestError
+from trade_hub.core.usecases import invalidate_rates_cache
+from trade_hub.infra.settings import settings
 from trade_hub.parser_service.api_clients import (
+    NOT_MODIFIED,
     BaseApiClient,
     CoinGeckoClient,
     ExchangeRateApiClient,
@@ -23,6 +26,8 @@ class RatesUpdater:
         storage: RatesStorage = None,
     ):
         self.clients = clients or [CoinGeckoClient(), ExchangeRateApiClient()]
+        # (lowercased source name, client) pairs for source filtering
+        self._client_names = tuple((c.source_name.lower(), c) for c in self.clients)
         self.storage = storage or RatesStorage()
 
     def run_update(self, source: str = None) -> dict:
@@ -36,7 +41,9 @@ class RatesUpdater:
             dict with update results: {
                 "success": bool,
                 "total_rates": int,
-                "sources": {source_name: {"rates": int, "error": str|None}},
+                "saved": bool,
+                "sources": {source_name: {"rates": int, "error": str|None,
+                                          "not_modified": bool}},
                 "last_refresh": str
             }
         """
@@ -44,6 +51,7 @@ class RatesUpdater:
         results = {
             "success": True,
             "total_rates": 0,
+            "saved": False,
             "sources": {},
             "errors": [],
             "last_refresh": None,
@@ -52,38 +60,70 @@ class RatesUpdater:
         all_rates = {}
         clients_to_use = self._filter_clients(source)
 
+        # A 304 only means "still as stored": if rates file lost a source's
+        # pairs (deleted, reset), fetch that source in full again
+        stored_sources = {pair.get("source") for pair in self.storage.get_all_rates().values()}
         for client in clients_to_use:
-            source_name = client.source_name
-            logger.info(f"Fetching from {source_name}...")
+            if client.source_name not in stored_sources:
+                client.reset_validators()
+
+        # Sources are independent and I/O-bound: fetch them in parallel.
+        # Each outcome is logged as soon as its fetch ends; results are
+        # merged in client order so overlapping pairs resolve the same way.
+        if len(clients_to_use) < 2:
+            outcomes = [self._fetch(client) for client in clients_to_use]
+        else:
+            with ThreadPoolExecutor(max_workers=len(clients_to_use)) as executor:
+                outcomes = list(executor.map(self._fetch, clients_to_use))
 
-            try:
-                rates = client.fetch_rates()
+        unchanged = False
+        fetched_clients = []
+        for client, (rates, error_msg) in zip(clients_to_use, outcomes):
+            source_name = client.source_name
+            if rates is NOT_MODIFIED:
+                unchanged = True
+                results["sources"][source_name] = {
+                    "rates": 0,
+                    "error": None,
+                    "not_modified": True,
+                }
+            elif error_msg is None:
                 all_rates.update(rates)
+                fetched_clients.append(client)
                 results["sources"][source_name] = {
                     "rates": len(rates),
                     "error": None,
+                    "not_modified": False,
                 }
-                logger.info(f"{source_name}: OK ({len(rates)} rates)")
-
-            except ApiRequestError as e:
-                error_msg = str(e)
+            else:
                 results["sources"][source_name] = {
                     "rates": 0,
                     "error": error_msg,
+                    "not_modified": False,
                 }
                 results["errors"].append(f"{source_name}: {error_msg}")
-                logger.error(f"{source_name}: FAILED - {error_msg}")
 
-        if all_rates:
-            self.storage.save_rates(all_rates)
-            self.storage.save_to_history(all_rates)
-            results["total_rates"] = len(all_rates)
-            results["last_refresh"] = datetime.now(timezone.utc).isoformat()
+        if all_rates or unchanged:
+            # Unchanged rates (or 304s alone) are written only once stored
+            # last_refresh is older than rates TTL, to keep file timestamps current
+            if self.storage.save_rates(all_rates, max_age=settings.rates_ttl):
+                # rates.json is replaced: drop in-memory rates even if history append fails
+                invalidate_rates_cache()
+                if all_rates:
+                    self.storage.save_to_history(all_rates)
+                results["saved"] = True
+            # Rates are stored now (or already were): 304s may be trusted.
+            # A failed save raises before this, so the next fetch is full.
+            for client in fetched_clients:
+                client.commit_validators()
+            results["total_rates"] = len(all_rates) or len(self.storage.get_all_rates())
+            # Timestamp stored with the rates
+            results["last_refresh"] = self.storage.load_rates().get("last_refresh")
         else:
             results["success"] = False
 
         if results["errors"]:
-            results["success"] = len(all_rates) > 0  # Partial success
+            results["success"] = len(all_rates) > 0 or unchanged  # Partial success
 
         logger.info(
             f"Update completed: {results['total_rates']} rates, "
@@ -91,19 +131,39 @@ class RatesUpdater:
         )
         return results
 
+    def _fetch(self, client: BaseApiClient) -> tuple[dict | None, str | None]:
+        """
+        Fetch rates from single client.
+
+        Returns:
+            tuple: (rates, None) on success or (None, error message) on API error
+        """
+        source_name = client.source_name
+        logger.info(f"Fetching from {source_name}...")
+
+        try:
+            rates = client.fetch_rates()
+        except ApiRequestError as e:
+            error_msg = str(e)
+            logger.error(f"{source_name}: FAILED - {error_msg}")
+            return None, error_msg
+
+        if rates is NOT_MODIFIED:
+            logger.info(f"{source_name}: not modified")
+        else:
+            logger.info(f"{source_name}: OK ({len(rates)} rates)")
+        return rates, None
+
     def _filter_clients(self, source: str = None) -> list[BaseApiClient]:
         """Filter clients by source name."""
         if not source:
             return self.clients
 
         source = source.lower()
-        filtered = []
-        for client in self.clients:
-            name = client.source_name.lower()
-            if source in name or name in source:
-                filtered.append(client)
-
-        return filtered if filtered else self.clients
+        filtered = [
+            client for name, client in self._client_names if source in name or name in source
+        ]
+        return filtered or self.clients
 
     def update_crypto_only(self) -> dict:
         """Update only cryptocurrency rates."""